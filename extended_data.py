@@ -3,9 +3,13 @@
 
 import csv
 import urllib.request
-import json
 import os
+import pickle
+import shutil
+import sys
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from smart_search import write_json
 
 def download_airport_data():
     """Download comprehensive airport data from OpenFlights database"""
@@ -18,7 +22,9 @@ def download_airport_data():
     url = "https://raw.githubusercontent.com/jpatokal/openflights/master/data/airports.dat"
     
     try:
-        urllib.request.urlretrieve(url, 'data/airports_raw.dat')
+        # Stream straight to disk in 1 MiB chunks instead of buffering the whole response
+        with urllib.request.urlopen(url) as response, open('data/airports_raw.dat', 'wb') as f:
+            shutil.copyfileobj(response, f, length=1 << 20)
         print("✅ Raw airport data downloaded!")
         return True
     except Exception as e:
@@ -52,135 +58,161 @@ def create_sample_data():
         for row in sample_data:
             writer.writerow(row)
 
+def parse_int(value):
+    """Convert a raw field to int, using 0 for blanks and \\N placeholders
+    
+    Any other value that is not an integer is reported before being recorded as 0.
+    """
+    try:
+        return int(value)
+    except ValueError:
+        if value not in ('', '\\N'):
+            print(f"⚠️  Rejected non-integer value {value!r}, using 0")
+        return 0
+
 def process_airport_data():
-    """Process raw airport data into structured format"""
+    """Process raw airport data into the airport list and its search indexes
+    
+    The indexes are built in the same pass that parses the rows. They hold
+    positions into the airport list rather than copies of the airports, so
+    each airport is serialized exactly once. Repeated string fields are
+    interned, so the pickle stores each distinct value once.
+    """
     print("🔄 Processing airport data...")
     
     airports = []
-    countries = set()
-    cities = set()
+    iata_index = {}
+    icao_index = {}
+    city_index = defaultdict(list)
+    country_index = defaultdict(list)
     
     try:
         with open('data/airports_raw.dat', 'r', encoding='utf-8') as f:
+            # csv.reader already removes the quoting around each field, so the
+            # values are used as-is; quotes inside names are part of the name
             reader = csv.reader(f)
             for row in reader:
-                if len(row) >= 14:  # Ensure row has all required fields
-                    airport = {
-                        'id': int(row[0]) if row[0].isdigit() else 0,
-                        'name': row[1].strip('"'),
-                        'city': row[2].strip('"'),
-                        'country': row[3].strip('"'),
-                        'iata': row[4].strip('"'),
-                        'icao': row[5].strip('"'),
-                        'latitude': float(row[6]) if row[6] else 0.0,
-                        'longitude': float(row[7]) if row[7] else 0.0,
-                        'elevation': int(row[8]) if row[8].isdigit() else 0,
-                        'timezone': row[11].strip('"'),
-                        'type': row[12].strip('"'),
-                        'source': row[13].strip('"')
-                    }
-                    
-                    # Only include airports with valid IATA codes
-                    if airport['iata'] and len(airport['iata']) == 3:
-                        airports.append(airport)
-                        countries.add(airport['country'])
-                        cities.add(f"{airport['city']}, {airport['country']}")
+                if len(row) < 14:  # Ensure row has all required fields
+                    continue
+                
+                # Only include airports with valid IATA codes - reject the rest
+                # before converting any of their fields
+                iata = row[4]
+                if len(iata) != 3:
+                    continue
+                
+                airport = {
+                    'id': parse_int(row[0]),
+                    'name': row[1],
+                    'city': sys.intern(row[2]),
+                    'country': sys.intern(row[3]),
+                    'iata': iata,
+                    'icao': row[5],
+                    'latitude': float(row[6]) if row[6] else 0.0,
+                    'longitude': float(row[7]) if row[7] else 0.0,
+                    'elevation': parse_int(row[8]),
+                    'timezone': sys.intern(row[11]),
+                    'type': sys.intern(row[12]),
+                    'source': sys.intern(row[13])
+                }
+                position = len(airports)
+                airports.append(airport)
+                
+                iata_index[iata] = position
+                if airport['icao']:
+                    icao_index[airport['icao']] = position
+                city_index[f"{airport['city']}, {airport['country']}"].append(position)
+                country_index[airport['country']].append(position)
     
     except Exception as e:
         print(f"❌ Error processing data: {e}")
-        return None, None, None
+        return None, None, None, None, None
     
-    print(f"✅ Processed {len(airports)} airports from {len(countries)} countries")
-    return airports, list(countries), list(cities)
+    print(f"✅ Processed {len(airports)} airports from {len(country_index)} countries")
+    return airports, iata_index, icao_index, dict(city_index), dict(country_index)
 
-def save_processed_data(airports, countries, cities):
-    """Save processed data to JSON files"""
-    print("💾 Saving processed data...")
-    
-    # Save main airport database
-    with open('data/airport_data.json', 'w', encoding='utf-8') as f:
-        json.dump(airports, f, indent=2, ensure_ascii=False)
+def write_pickle(path, data):
+    """Write data as a protocol 5 pickle"""
+    with open(path, 'wb') as f:
+        pickle.dump(data, f, protocol=5)
 
-    # Save countries list
-    with open('data/countries.json', 'w', encoding='utf-8') as f:
-        json.dump(sorted(countries), f, indent=2)
-    
-    # Save cities list
-    with open('data/cities.json', 'w', encoding='utf-8') as f:
-        json.dump(sorted(cities), f, indent=2)
+def save_processed_data(airports, iata_index, icao_index, city_index, country_index, human_readable=False):
+    """Save processed data, plus JSON copies when human_readable is set"""
+    print("💾 Saving processed data...")
     
-    # Create search indexes
-    create_search_indexes(airports)
+    indexes = {
+        'airports': airports,
+        'iata': iata_index,
+        'icao': icao_index,
+        'city': city_index,
+        'country': country_index
+    }
+    
+    outputs = []
+    if human_readable:
+        # Country and "city, country" lists are just the sorted index keys
+        outputs += [
+            (write_json, 'data/airport_data.json', airports),
+            (write_json, 'data/countries.json', sorted(country_index)),
+            (write_json, 'data/cities.json', sorted(city_index)),
+            (write_json, 'data/iata_index.json', iata_index),
+            (write_json, 'data/icao_index.json', icao_index),
+            (write_json, 'data/city_index.json', city_index),
+            (write_json, 'data/country_index.json', country_index)
+        ]
+    
+    # The JSON copies are independent files. Serializing them holds the GIL,
+    # so the thread pool only lets one file's disk write run alongside the
+    # next file's serialization. Without --human-readable there is nothing to
+    # hand to it.
+    if outputs:
+        with ThreadPoolExecutor() as executor:
+            jobs = [executor.submit(writer, path, data) for writer, path, data in outputs]
+            for job in jobs:
+                job.result()  # Re-raise any write error
+    
+    # The airports and all indexes go into one pickle blob, written last so it
+    # is never older than the JSON copies and AirportSearch treats it as fresh
+    write_pickle('data/indexes.pkl', indexes)
     
     print("✅ All data saved successfully!")
 
-def create_search_indexes(airports):
-    """Create search indexes for fast lookups"""
-    print("🔍 Creating search indexes...")
-    
-    # IATA code index
-    iata_index = {airport['iata']: airport for airport in airports if airport['iata']}
-    
-    # ICAO code index
-    icao_index = {airport['icao']: airport for airport in airports if airport['icao']}
-    
-    # City index
-    city_index = defaultdict(list)
-    for airport in airports:
-        city_key = f"{airport['city']}, {airport['country']}"
-        city_index[city_key].append(airport)
-    
-    # Country index
-    country_index = defaultdict(list)
-    for airport in airports:
-        country_index[airport['country']].append(airport)
-    
-    # Save indexes
-    with open('data/iata_index.json', 'w', encoding='utf-8') as f:
-        json.dump(iata_index, f, indent=2, ensure_ascii=False)
-    
-    with open('data/icao_index.json', 'w', encoding='utf-8') as f:
-        json.dump(icao_index, f, indent=2, ensure_ascii=False)
-    
-    with open('data/city_index.json', 'w', encoding='utf-8') as f:
-        json.dump(dict(city_index), f, indent=2, ensure_ascii=False)
-    
-    with open('data/country_index.json', 'w', encoding='utf-8') as f:
-        json.dump(dict(country_index), f, indent=2, ensure_ascii=False)
-    
-    print("✅ Search indexes created!")
-
 def main():
     """Main function to create the big dataset"""
     print("🚀 Starting Extended Airport Dataset Creation...")
+    human_readable = '--human-readable' in sys.argv
     print("=" * 50)
     
     # Step 1: Download raw data
     download_success = download_airport_data()
     
     # Step 2: Process the data
-    airports, countries, cities = process_airport_data()
+    airports, iata_index, icao_index, city_index, country_index = process_airport_data()
     
     if airports is None:
         print("❌ Failed to process airport data")
         return
     
     # Step 3: Save processed data
-    save_processed_data(airports, countries, cities)
+    save_processed_data(airports, iata_index, icao_index, city_index, country_index, human_readable)
     
     print("=" * 50)
     print("🎉 Extended Dataset Creation Complete!")
     print(f"📊 Total airports: {len(airports)}")
-    print(f"🌍 Countries covered: {len(countries)}")
-    print(f"🏙️ Cities covered: {len(cities)}")
+    print(f"🌍 Countries covered: {len(country_index)}")
+    print(f"🏙️ Cities covered: {len(city_index)}")
     print("\n📁 Files created:")
-    print("  - data/airports.json (main database)")
-    print("  - data/countries.json (countries list)")
-    print("  - data/cities.json (cities list)")
-    print("  - data/iata_index.json (IATA lookup)")
-    print("  - data/icao_index.json (ICAO lookup)")
-    print("  - data/city_index.json (city lookup)")
-    print("  - data/country_index.json (country lookup)")
+    print("  - data/indexes.pkl (airport database and lookup indexes)")
+    if human_readable:
+        print("  - data/airport_data.json (main database)")
+        print("  - data/countries.json (countries list)")
+        print("  - data/cities.json (cities list)")
+        print("  - data/iata_index.json (IATA lookup)")
+        print("  - data/icao_index.json (ICAO lookup)")
+        print("  - data/city_index.json (city lookup)")
+        print("  - data/country_index.json (country lookup)")
+    else:
+        print("  (run with --human-readable to also export JSON files)")
     print("\n▶️ Next: Run 'python smart_search.py' for airport lookups!")
 
 if __name__ == "__main__":
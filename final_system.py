@@ -5,13 +5,14 @@
 import os
 import sys
 import json
+import math
 from datetime import datetime
+from functools import cached_property
+from types import SimpleNamespace
 
-# Import all modules
+# Import the search engine; advanced features and statistics are imported on first use
 try:
-    from smart_search import AirportSearch
-    from advanced_features import AdvancedAirportFeatures
-    from statistics_reports import AirportStatistics
+    from smart_search import AirportSearch, database_exists
 except ImportError as e:
     print(f"❌ Error importing modules: {e}")
     print("Please ensure all files are in the same directory:")
@@ -21,6 +22,138 @@ except ImportError as e:
     print("  - statistics_reports.py")
     sys.exit(1)
 
+# Live search completion is optional; plain input() is used without prompt_toolkit
+try:
+    from prompt_toolkit import PromptSession
+    from prompt_toolkit.completion import Completer, Completion
+except ImportError:
+    PromptSession = None
+    Completer = object
+
+EARTH_RADIUS_KM = 6371.0
+
+# Static screen text, built once at import instead of on every redraw
+SEP70 = '=' * 70
+SEP60 = '=' * 60
+SEP50 = '=' * 50
+
+# Filled in once with the database counts when the system starts
+WELCOME_TMPL = """
+{sep}
+✈️  COMPLETE AIRPORT INFORMATION SYSTEM
+{sep}
+🌍 Global Airport Database - Version {version}
+📅 Last Updated: {updated}
+📊 Total Airports: {airports:,}
+🏳️  Countries Covered: {countries:,}
+🏙️  Cities: {cities:,}
+{sep}
+🎯 Features Available:
+   🔍 Smart Airport Search (IATA/ICAO codes, names, cities)
+   📏 Distance Calculator between airports
+   🌍 Nearby Airport Finder
+   🏳️  Country-wise Airport Listings
+   📊 Statistics and Reports
+   💾 Data Export Capabilities
+{sep}
+"""
+
+MAIN_MENU = f"""
+{SEP50}
+🎯 MAIN MENU
+{SEP50}
+1. 🔍 Airport Search & Lookup
+2. 📏 Distance & Location Tools
+3. 📊 Statistics & Reports
+4. ℹ️  System Information
+5. 💡 Help & Usage Tips
+6. ❌ Exit System
+{SEP50}
+"""
+
+HELP_TEXT = f"""
+{SEP60}
+💡 HELP & USAGE TIPS
+{SEP60}
+🔍 Search Tips:
+   • Use IATA codes (3 letters): LAX, JFK, LHR
+   • Use ICAO codes (4 letters): KLAX, KJFK, EGLL
+   • Search by airport name: 'Los Angeles'
+   • Search by city name: 'London'
+   • Partial matches work: 'Kennedy' finds JFK
+
+📏 Distance Calculator:
+   • Enter any two airport codes
+   • Results show both km and miles
+   • Includes estimated flight time
+
+🌍 Nearby Airports:
+   • Find airports within specified radius
+   • Default radius is 100km
+   • Results sorted by distance
+
+📊 Statistics Features:
+   • Global airport overview
+   • Country rankings
+   • Detailed country analysis
+   • Export data to JSON files
+
+⌨️  General Tips:
+   • Press Ctrl+C to interrupt any operation
+   • Airport codes are case-insensitive
+   • Use 'q' or 'quit' to exit most menus
+{SEP60}
+"""
+
+SEARCH_MENU = f"""
+{SEP50}
+🔍 AIRPORT SEARCH & LOOKUP
+{SEP50}
+1. 🔎 Quick Airport Search
+2. 🏳️  Browse by Country
+3. 🏙️  Browse by City
+4. 📋 List All Countries
+5. 🔙 Back to Main Menu
+{SEP50}
+"""
+
+DISTANCE_MENU = f"""
+{SEP50}
+📏 DISTANCE & LOCATION TOOLS
+{SEP50}
+1. 📏 Calculate Distance Between Airports
+2. 🌍 Find Nearby Airports
+3. 🎯 Airport Location Details
+4. 🔙 Back to Main Menu
+{SEP50}
+"""
+
+SYSTEM_FILES = [
+    ("data/indexes.pkl", "Airport database"),
+    ("smart_search.py", "Search engine"),
+    ("advanced_features.py", "Advanced features"),
+    ("statistics_reports.py", "Statistics system"),
+    ("final_system.py", "Main system")
+]
+
+class AirportCompleter(Completer):
+    """Suggest airports for the text typed so far, one prefix map lookup per keystroke"""
+    
+    def __init__(self, lookup, limit=20):
+        self.lookup = lookup
+        self.limit = limit
+    
+    def get_completions(self, document, complete_event):
+        text = document.text_before_cursor
+        if not text.strip():
+            return
+        for airport in self.lookup(text)[:self.limit]:
+            yield Completion(
+                airport['iata'],
+                start_position=-len(text),
+                display=f"{airport['iata']} - {airport['name']}, {airport['city']}"
+            )
+
 class CompleteAirportSystem:
     """Complete integrated airport information system"""
     
@@ -29,135 +162,223 @@ class CompleteAirportSystem:
         print("🚀 Initializing Complete Airport System...")
         print("📊 Loading airport database...")
         
-        # Initialize all components
-        self.search_system = AirportSearch()
-        self.advanced_features = AdvancedAirportFeatures()
-        self.statistics_system = AirportStatistics()
+        # Load the search engine now, since the counts below need its data. The
+        # other components and lookup structures are built on first use.
+        search = self.search_system
+        
+        # Airports never change after load, so gather every count once
+        self.counts = SimpleNamespace(
+            airports=len(search.airports),
+            countries=len(search.country_index),
+            cities=len(set(search.cities)),
+            iata=len(search.iata_index),
+            icao=len(search.icao_index)
+        )
         
         # System info
         self.version = "1.0.0"
         self.last_updated = "2024-12-19"
+        self._welcome_text = WELCOME_TMPL.format(
+            sep=SEP70, version=self.version, updated=self.last_updated, **vars(self.counts)
+        )
         
         print("✅ System initialized successfully!")
-        print(f"📋 Loaded {len(self.search_system.airports):,} airports from {len(self.search_system.country_index)} countries")
+        print(f"📋 Loaded {self.counts.airports:,} airports from {self.counts.countries} countries")
+    
+    @cached_property
+    def search_system(self):
+        """Airport search engine"""
+        return AirportSearch()
+    
+    @cached_property
+    def advanced_features(self):
+        """Distance and nearby tools, imported on first use"""
+        from advanced_features import AdvancedAirportFeatures
+        return AdvancedAirportFeatures()
+    
+    @cached_property
+    def statistics_system(self):
+        """Statistics and reports, imported on first use"""
+        from statistics_reports import AirportStatistics
+        return AirportStatistics()
+    
+    @cached_property
+    def prefix_map(self):
+        """Map every lowercase prefix of code, city and name tokens to its airports"""
+        prefix_map = {}
+        for airport in self.search_system.airports:
+            for field in ('iata', 'icao', 'city', 'name'):
+                for token in (airport.get(field) or '').lower().split():
+                    for k in range(1, len(token) + 1):
+                        prefix_map.setdefault(token[:k], []).append(airport)
+        return prefix_map
+    
+    def _prefix_search(self, query):
+        """Find airports with a token starting with each word of the query"""
+        results = None
+        for token in query.lower().split():
+            seen = set()
+            matches = []
+            for airport in self.prefix_map.get(token, []):
+                if id(airport) not in seen:
+                    seen.add(id(airport))
+                    matches.append(airport)
+            if results is None:
+                results = matches
+            else:
+                results = [airport for airport in results if id(airport) in seen]
+        return results or []
+    
+    @cached_property
+    def spatial_grid(self):
+        """Bucket airports into 1-degree lat/lon cells for bounded nearby searches"""
+        grid = {}
+        for airport in self.search_system.airports:
+            cell = (math.floor(airport['latitude']), math.floor(airport['longitude']) % 360)
+            # Keep radians and cos(lat) with each entry so distance checks skip the conversions
+            lat_rad = math.radians(airport['latitude'])
+            point = (lat_rad, math.radians(airport['longitude']), math.cos(lat_rad))
+            grid.setdefault(cell, []).append((airport, point))
+        return grid
+    
+    @cached_property
+    def _read_search_query(self):
+        """Query prompt for quick search, with live completion when available"""
+        if PromptSession is None or not sys.stdin.isatty():
+            return input
+        session = PromptSession(completer=AirportCompleter(self._prefix_search), complete_while_typing=True)
+        return session.prompt
+    
+    @cached_property
+    def _country_lines(self):
+        """Sorted, formatted country list for the search menu"""
+        country_index = self.search_system.country_index
+        return [
+            f"{i:3d}. {country} ({len(country_index[country])} airports)"
+            for i, country in enumerate(sorted(country_index), 1)
+        ]
+    
+    def _render_location(self, airport):
+        """Build the location details card for an airport"""
+        lines = [
+            f"\n{SEP50}",
+            "📍 LOCATION DETAILS",
+            SEP50,
+            f"✈️  Airport: {airport['name']}",
+            f"🏷️  IATA/ICAO: {airport['iata']}/{airport['icao']}",
+            f"🏙️  City: {airport['city']}",
+            f"🏳️  Country: {airport['country']}",
+            f"🌍 Coordinates: {airport['latitude']:.4f}, {airport['longitude']:.4f}"
+        ]
+        if airport.get('elevation'):
+            lines.append(f"⛰️  Elevation: {airport['elevation']} ft")
+        if airport.get('timezone'):
+            lines.append(f"🕐 Timezone: {airport['timezone']}")
+        lines.append(SEP50)
+        return '\n'.join(lines) + '\n'
+    
+    def find_nearby_fast(self, code, radius_km):
+        """Find airports within radius_km of an airport, nearest first"""
+        results = self.search_system.search_by_code(code, suggest=True)
+        if not results:
+            return None, []
+        
+        ref_airport = results[0]
+        lat0, lon0 = ref_airport['latitude'], ref_airport['longitude']
+        
+        # Only scan grid cells inside the lat/lon bounding box of the search circle
+        angular_radius = radius_km / EARTH_RADIUS_KM
+        lat_span = math.degrees(angular_radius)
+        lat_cells = range(max(-90, math.floor(lat0 - lat_span)), min(90, math.floor(lat0 + lat_span)) + 1)
+        if abs(lat0) + lat_span >= 90:
+            lon_cells = range(360)
+        else:
+            lon_span = math.degrees(math.asin(min(1.0, math.sin(angular_radius) / math.cos(math.radians(lat0)))))
+            lon_cells = {cell % 360 for cell in range(math.floor(lon0 - lon_span), math.floor(lon0 + lon_span) + 1)}
+        
+        candidates = []
+        for lat_cell in lat_cells:
+            for lon_cell in lon_cells:
+                candidates.extend(self.spatial_grid.get((lat_cell, lon_cell), ()))
+        
+        # Haversine distance using the radians and cos(lat) stored in the grid
+        sin, asin, sqrt = math.sin, math.asin, math.sqrt
+        lat0_rad, lon0_rad = math.radians(lat0), math.radians(lon0)
+        cos_lat0 = math.cos(lat0_rad)
+        nearby_airports = []
+        for airport, (lat, lon, cos_lat) in candidates:
+            if airport is ref_airport:
+                continue
+            a = sin((lat - lat0_rad) / 2) ** 2 + cos_lat0 * cos_lat * sin((lon - lon0_rad) / 2) ** 2
+            distance = 2 * EARTH_RADIUS_KM * asin(sqrt(min(1.0, a)))
+            if distance <= radius_km:
+                nearby_airports.append((airport, distance))
+        nearby_airports.sort(key=lambda item: item[1])
+        return ref_airport, nearby_airports
+    
+    def _write(self, text):
+        """Emit a fully rendered screen with a single write"""
+        sys.stdout.write(text)
+        sys.stdout.flush()
     
     def display_welcome(self):
         """Display welcome screen"""
-        print(f"\n{'='*70}")
-        print("✈️  COMPLETE AIRPORT INFORMATION SYSTEM")
-        print(f"{'='*70}")
-        print(f"🌍 Global Airport Database - Version {self.version}")
-        print(f"📅 Last Updated: {self.last_updated}")
-        print(f"📊 Total Airports: {len(self.search_system.airports):,}")
-        print(f"🏳️  Countries Covered: {len(self.search_system.country_index):,}")
-        print(f"🏙️  Cities: {len(set(airport['city'] for airport in self.search_system.airports)):,}")
-        print(f"{'='*70}")
-        print("🎯 Features Available:")
-        print("   🔍 Smart Airport Search (IATA/ICAO codes, names, cities)")
-        print("   📏 Distance Calculator between airports")
-        print("   🌍 Nearby Airport Finder")
-        print("   🏳️  Country-wise Airport Listings")
-        print("   📊 Statistics and Reports")
-        print("   💾 Data Export Capabilities")
-        print(f"{'='*70}")
+        self._write(self._welcome_text)
     
     def display_main_menu(self):
         """Display main menu"""
-        print(f"\n{'='*50}")
-        print("🎯 MAIN MENU")
-        print(f"{'='*50}")
-        print("1. 🔍 Airport Search & Lookup")
-        print("2. 📏 Distance & Location Tools")
-        print("3. 📊 Statistics & Reports")
-        print("4. ℹ️  System Information")
-        print("5. 💡 Help & Usage Tips")
-        print("6. ❌ Exit System")
-        print(f"{'='*50}")
+        self._write(MAIN_MENU)
     
-    def display_system_info(self):
-        """Display system information"""
-        print(f"\n{'='*60}")
-        print("ℹ️  SYSTEM INFORMATION")
-        print(f"{'='*60}")
-        print(f"📋 System Version: {self.version}")
-        print(f"📅 Last Updated: {self.last_updated}")
-        print(f"🐍 Python Version: {sys.version.split()[0]}")
-        print(f"📂 Current Directory: {os.getcwd()}")
-        print()
-        print("📊 Database Statistics:")
-        print(f"   ✈️  Total Airports: {len(self.search_system.airports):,}")
-        print(f"   🏳️  Countries: {len(self.search_system.country_index):,}")
-        print(f"   🏙️  Cities: {len(set(airport['city'] for airport in self.search_system.airports)):,}")
-        print(f"   🏷️  IATA Codes: {len(self.search_system.iata_index):,}")
-        print(f"   📡 ICAO Codes: {len(self.search_system.icao_index):,}")
-        print()
-        print("📁 Required Files:")
-        files_status = [
-            ("airport_data.json", "Airport database"),
-            ("smart_search.py", "Search engine"),
-            ("advanced_features.py", "Advanced features"),
-            ("statistics_reports.py", "Statistics system"),
-            ("final_system.py", "Main system")
+    @cached_property
+    def _file_status(self):
+        """Presence of each system file; the files do not move while running"""
+        return {filename: os.path.exists(filename) for filename, _ in SYSTEM_FILES}
+    
+    def _render_system_info(self):
+        """Build the system information screen text"""
+        lines = [
+            f"\n{SEP60}",
+            "ℹ️  SYSTEM INFORMATION",
+            SEP60,
+            f"📋 System Version: {self.version}",
+            f"📅 Last Updated: {self.last_updated}",
+            f"🐍 Python Version: {sys.version.split()[0]}",
+            f"📂 Current Directory: {os.getcwd()}",
+            "",
+            "📊 Database Statistics:",
+            f"   ✈️  Total Airports: {self.counts.airports:,}",
+            f"   🏳️  Countries: {self.counts.countries:,}",
+            f"   🏙️  Cities: {self.counts.cities:,}",
+            f"   🏷️  IATA Codes: {self.counts.iata:,}",
+            f"   📡 ICAO Codes: {self.counts.icao:,}",
+            "",
+            "📁 Required Files:"
         ]
+        for filename, description in SYSTEM_FILES:
+            status = "✅" if self._file_status[filename] else "❌"
+            lines.append(f"   {status} {filename} - {description}")
         
-        for filename, description in files_status:
-            status = "✅" if os.path.exists(filename) else "❌"
-            print(f"   {status} {filename} - {description}")
-        
-        print(f"{'='*60}")
+        lines.append(SEP60)
+        return '\n'.join(lines) + '\n'
+    
+    def display_system_info(self):
+        """Display system information"""
+        self._write(self._render_system_info())
     
     def display_help(self):
         """Display help and usage tips"""
-        print(f"\n{'='*60}")
-        print("💡 HELP & USAGE TIPS")
-        print(f"{'='*60}")
-        print("🔍 Search Tips:")
-        print("   • Use IATA codes (3 letters): LAX, JFK, LHR")
-        print("   • Use ICAO codes (4 letters): KLAX, KJFK, EGLL")
-        print("   • Search by airport name: 'Los Angeles'")
-        print("   • Search by city name: 'London'")
-        print("   • Partial matches work: 'Kennedy' finds JFK")
-        print()
-        print("📏 Distance Calculator:")
-        print("   • Enter any two airport codes")
-        print("   • Results show both km and miles")
-        print("   • Includes estimated flight time")
-        print()
-        print("🌍 Nearby Airports:")
-        print("   • Find airports within specified radius")
-        print("   • Default radius is 100km")
-        print("   • Results sorted by distance")
-        print()
-        print("📊 Statistics Features:")
-        print("   • Global airport overview")
-        print("   • Country rankings")
-        print("   • Detailed country analysis")
-        print("   • Export data to JSON files")
-        print()
-        print("⌨️  General Tips:")
-        print("   • Press Ctrl+C to interrupt any operation")
-        print("   • Airport codes are case-insensitive")
-        print("   • Use 'q' or 'quit' to exit most menus")
-        print(f"{'='*60}")
+        self._write(HELP_TEXT)
     
     def run_search_menu(self):
         """Run search and lookup menu"""
         while True:
-            print(f"\n{'='*50}")
-            print("🔍 AIRPORT SEARCH & LOOKUP")
-            print(f"{'='*50}")
-            print("1. 🔎 Quick Airport Search")
-            print("2. 🏳️  Browse by Country")
-            print("3. 🏙️  Browse by City")
-            print("4. 📋 List All Countries")
-            print("5. 🔙 Back to Main Menu")
-            print(f"{'='*50}")
+            self._write(SEARCH_MENU)
             
             try:
                 choice = input("Choose option (1-5): ").strip()
                 
                 if choice == '1':
-                    self.search_system.run_search()
+                    self.search_system.run_search(self._read_search_query)
                 elif choice == '2':
                     country = input("Enter country name: ").strip()
                     if country:
@@ -165,14 +386,11 @@ class CompleteAirportSystem:
                 elif choice == '3':
                     city = input("Enter city name: ").strip()
                     if city:
-                        results = self.search_system.search_airports(city)
+                        results = self._prefix_search(city)
                         self.search_system.display_results(results, city)
                 elif choice == '4':
                     print("\n🏳️  Available Countries:")
-                    countries = sorted(self.search_system.country_index.keys())
-                    for i, country in enumerate(countries, 1):
-                        count = len(self.search_system.country_index[country])
-                        print(f"{i:3d}. {country} ({count} airports)")
+                    print('\n'.join(self._country_lines))
                 elif choice == '5':
                     break
                 else:
@@ -187,14 +405,7 @@ class CompleteAirportSystem:
     def run_distance_menu(self):
         """Run distance and location tools menu"""
         while True:
-            print(f"\n{'='*50}")
-            print("📏 DISTANCE & LOCATION TOOLS")
-            print(f"{'='*50}")
-            print("1. 📏 Calculate Distance Between Airports")
-            print("2. 🌍 Find Nearby Airports")
-            print("3. 🎯 Airport Location Details")
-            print("4. 🔙 Back to Main Menu")
-            print(f"{'='*50}")
+            self._write(DISTANCE_MENU)
             
             try:
                 choice = input("Choose option (1-4): ").strip()
@@ -213,37 +424,27 @@ class CompleteAirportSystem:
                     airport_code = input("Enter airport code: ").strip()
                     
                     if airport_code:
-                        try:
-                            radius = input("Enter radius in km (default 100): ").strip()
-                            radius_km = int(radius) if radius else 100
-                        except ValueError:
-                            radius_km = 100
+                        radius = input("Enter radius in km (default 100): ").strip()
+                        radius_km = int(radius) if radius.isdecimal() else 100
+                        if radius and not radius.isdecimal():
+                            print(f"⚠️  Invalid radius '{radius}', using default 100 km")
                         
-                        ref_airport, nearby_airports = self.advanced_features.find_nearby_airports(airport_code, radius_km)
+                        ref_airport, nearby_airports = self.find_nearby_fast(airport_code, radius_km)
                         if ref_airport:
                             self.advanced_features.display_nearby_airports(ref_airport, nearby_airports, radius_km)
+                        else:
+                            print(f"❌ Airport '{airport_code}' not found")
                 
                 elif choice == '3':
                     print("\n🎯 AIRPORT LOCATION DETAILS")
                     airport_code = input("Enter airport code: ").strip()
                     
                     if airport_code:
-                        results = self.search_system.search_airports(airport_code)
+                        results = self._prefix_search(airport_code)
                         if results:
-                            airport = results[0]
-                            print(f"\n{'='*50}")
-                            print(f"📍 LOCATION DETAILS")
-                            print(f"{'='*50}")
-                            print(f"✈️  Airport: {airport['name']}")
-                            print(f"🏷️  IATA/ICAO: {airport['iata']}/{airport['icao']}")
-                            print(f"🏙️  City: {airport['city']}")
-                            print(f"🏳️  Country: {airport['country']}")
-                            print(f"🌍 Coordinates: {airport['latitude']:.4f}, {airport['longitude']:.4f}")
-                            if airport.get('elevation'):
-                                print(f"⛰️  Elevation: {airport['elevation']} ft")
-                            if airport.get('timezone'):
-                                print(f"🕐 Timezone: {airport['timezone']}")
-                            print(f"{'='*50}")
+                            code = airport_code.upper()
+                            airport = next((a for a in results if code in (a['iata'], a['icao'])), results[0])
+                            self._write(self._render_location(airport))
                         else:
                             print(f"❌ Airport '{airport_code}' not found")
                 
@@ -292,19 +493,19 @@ class CompleteAirportSystem:
                     self.display_help()
                 
                 elif choice == '6':
-                    print(f"\n{'='*50}")
+                    print(f"\n{SEP50}")
                     print("👋 Thank you for using the Complete Airport System!")
                     print("✈️  Safe travels!")
-                    print(f"{'='*50}")
+                    print(SEP50)
                     break
                 
                 else:
                     print("❌ Invalid choice. Please select 1-6.")
                     
             except KeyboardInterrupt:
-                print(f"\n{'='*50}")
+                print(f"\n{SEP50}")
                 print("👋 System interrupted. Goodbye!")
-                print(f"{'='*50}")
+                print(SEP50)
                 break
             except Exception as e:
                 print(f"❌ Unexpected error: {e}")
@@ -313,13 +514,15 @@ class CompleteAirportSystem:
 def check_dependencies():
     """Check if all required files exist"""
     required_files = [
-        'airport_data.json',
         'smart_search.py',
         'advanced_features.py', 
         'statistics_reports.py'
     ]
     
     missing_files = []
+    # The database is either data/indexes.pkl or the JSON copies it is rebuilt from
+    if not database_exists():
+        missing_files.append('data/indexes.pkl')
     for file in required_files:
         if not os.path.exists(file):
             missing_files.append(file)
@@ -329,7 +532,7 @@ def check_dependencies():
         for file in missing_files:
             print(f"   • {file}")
         print("\nPlease ensure all files are in the same directory:")
-        print("1. Run 'python extended_data.py' first to create airport_data.json")
+        print("1. Run 'python extended_data.py' first to create data/indexes.pkl")
         print("2. Ensure all Python files are present")
         return False
     
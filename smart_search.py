@@ -1,8 +1,138 @@
 #Day 3
 
 import json
+import mmap
 import os
+import pickle
+import sys
+from collections import defaultdict
 from difflib import get_close_matches
+from functools import lru_cache
+from importlib.util import find_spec
+from operator import itemgetter
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    from rapidfuzz import fuzz, process
+except ImportError:
+    process = None
+
+# rapidfuzz's batch scorer returns NumPy arrays, so it needs NumPy installed
+CDIST_AVAILABLE = process is not None and find_spec('numpy') is not None
+
+INDEX_CACHE = 'data/indexes.pkl'
+
+# Minimum similarity (0-1) for a fuzzy match to count
+FUZZY_CUTOFF = 0.6
+
+# Human-readable copies of the database, written by 'extended_data.py --human-readable'
+JSON_FILES = {
+    'airports': 'data/airport_data.json',
+    'iata': 'data/iata_index.json',
+    'icao': 'data/icao_index.json',
+    'city': 'data/city_index.json',
+    'country': 'data/country_index.json'
+}
+
+# Detailed airport card, filled in with str.format_map(airport)
+AIRPORT_CARD = '\n'.join([
+    '\n' + '=' * 60,
+    '🛫 {name}',
+    '📍 {city}, {country}',
+    '🔤 IATA: {iata} | ICAO: {icao}',
+    '🌍 Coordinates: {latitude:.4f}, {longitude:.4f}',
+    '📏 Elevation: {elevation} ft',
+    '🕐 Timezone: {timezone}',
+    '📊 Type: {type}',
+    '=' * 60
+]) + '\n'
+
+def database_exists():
+    """Check for the pickle cache or the JSON copies it can be rebuilt from"""
+    return os.path.exists(INDEX_CACHE) or os.path.exists(JSON_FILES['airports'])
+
+def uses_positions(data):
+    """Check that the indexes hold airport positions, as written by the current extended_data.py
+    
+    Older databases stored full airport dicts in the indexes instead.
+    """
+    iata_entries = data['iata'].values()
+    return all(isinstance(entry, int) for entry in iata_entries)
+
+def read_pickle(path):
+    """Unpickle a file straight from a read-only memory map"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        return pickle.loads(mm)
+
+def read_json(path):
+    """Read a JSON file through a read-only memory map, using orjson when it is installed"""
+    with open(path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+        if orjson:
+            # orjson parses straight from the mapped pages without a bytes copy
+            with memoryview(mm) as view:
+                return orjson.loads(view)
+        return json.loads(mm[:])
+
+def write_json(path, data):
+    """Write data as indented UTF-8 JSON, using orjson when it is installed"""
+    if orjson:
+        with open(path, 'wb') as f:
+            f.write(orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
+    else:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=2, ensure_ascii=False)
+
+def parse_float(value):
+    """Parse value as a float, or NaN when it is not a number"""
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return float('nan')
+
+def rapidfuzz_candidates(query, choices, cutoff=FUZZY_CUTOFF):
+    """Choices that could reach cutoff under difflib, narrowed down by RapidFuzz
+    
+    fuzz.ratio on the raw strings is an Indel (LCS) score, which is never
+    lower than difflib's matching-block ratio, so no difflib match is dropped.
+    """
+    matches = process.extract(
+        query, choices, scorer=fuzz.ratio, processor=None,
+        limit=None, score_cutoff=cutoff * 100 - 1e-6  # Allow for float rounding
+    )
+    return [choice for choice, score, index in matches]
+
+def close_matches(query, choices, limit, cutoff=FUZZY_CUTOFF):
+    """Best fuzzy matches for query among choices, exactly as difflib.get_close_matches
+    
+    When RapidFuzz is installed it prefilters the choices in C, so difflib
+    only scores the few that can pass.
+    """
+    if process:
+        choices = rapidfuzz_candidates(query, choices, cutoff)
+    return get_close_matches(query, choices, n=limit, cutoff=cutoff)
+
+def build_ngram_index(strings, n=3):
+    """Map every n-gram of each string to the set of positions containing it"""
+    index = defaultdict(set)
+    for position, text in enumerate(strings):
+        for i in range(len(text) - n + 1):
+            index[text[i:i + n]].add(position)
+    return dict(index)
+
+def ngram_candidates(index, needle, n=3):
+    """Sorted positions whose string contains every n-gram of needle
+    
+    Returns None when needle is shorter than n and cannot be narrowed down.
+    Candidates still need a substring check.
+    """
+    if len(needle) < n:
+        return None
+    postings = sorted((index.get(needle[i:i + n], set()) for i in range(len(needle) - n + 1)), key=len)
+    return sorted(set.intersection(*postings))
 
 class AirportSearch:
     def __init__(self):
@@ -12,26 +142,85 @@ class AirportSearch:
         self.city_index = {}
         self.country_index = {}
         self.load_data()
+        
+        # Repeated queries are answered from a per-instance cache of result positions
+        self._smart_search_cached = lru_cache(maxsize=512)(self._smart_search_impl)
     
     def load_data(self):
         """Load all airport data and indexes"""
         try:
-            # Load main airport database
-            with open('data/airport_data.json', 'r', encoding='utf-8') as f:  # Fixed filename
-                self.airports = json.load(f)
+            data = None
+            if self.cache_is_fresh():
+                # Airports and indexes saved together by extended_data.py
+                try:
+                    data = read_pickle(INDEX_CACHE)
+                except Exception as e:
+                    print(f"⚠️  Could not read index cache ({e}); rebuilding it from the JSON files")
+            
+            from_json = data is None
+            if from_json:
+                # Parse the JSON copies once; they are cached below for later runs
+                data = {key: read_json(path) for key, path in JSON_FILES.items()}
+            
+            if not uses_positions(data):
+                print("❌ Database is in an old format! Please re-run 'python extended_data.py'")
+                exit(1)
+            
+            self.airports = data['airports']
+            self.iata_index = data['iata']
+            self.icao_index = data['icao']
+            self.city_index = data['city']
+            self.country_index = data['country']
+            
+            # Indexes store positions into the airport list; resolve them once
+            # so every index shares the same airport dicts
+            airports = self.airports
+            self.iata_index = {code: airports[i] for code, i in self.iata_index.items()}
+            self.icao_index = {code: airports[i] for code, i in self.icao_index.items()}
+            self.city_index = {key: [airports[i] for i in positions] for key, positions in self.city_index.items()}
+            self.country_index = {key: [airports[i] for i in positions] for key, positions in self.country_index.items()}
             
-            # Load search indexes
-            with open('data/iata_index.json', 'r', encoding='utf-8') as f:
-                self.iata_index = json.load(f)
+            # These values repeat across thousands of airports; intern them so
+            # each distinct string is stored once and compares by identity
+            for airport in airports:
+                for field in ('country', 'city', 'timezone', 'type', 'source'):
+                    airport[field] = sys.intern(airport[field])
             
-            with open('data/icao_index.json', 'r', encoding='utf-8') as f:
-                self.icao_index = json.load(f)
+            # Column views of the airport list for whole-table passes
+            self.countries = [airport['country'] for airport in airports]
+            self.cities = [airport['city'] for airport in airports]
+            self.iata_codes = [airport['iata'] for airport in airports]
+            self.iata_lengths = [len(code) for code in self.iata_codes]
+            self.elevations = [parse_float(airport.get('elevation', 0)) for airport in airports]
             
-            with open('data/city_index.json', 'r', encoding='utf-8') as f:
-                self.city_index = json.load(f)
+            # Position of each airport in self.airports, keyed by object identity;
+            # the resolved indexes share these dicts, so any search result maps back
+            self._positions = {id(airport): i for i, airport in enumerate(airports)}
             
-            with open('data/country_index.json', 'r', encoding='utf-8') as f:
-                self.country_index = json.load(f)
+            # Key lists and lowercase keys, built once instead of on every query
+            self._all_codes = list(self.iata_index) + list(self.icao_index)
+            self._city_keys = list(self.city_index)
+            self._city_keys_lower = [key.lower() for key in self._city_keys]
+            self._city_ngrams = build_ngram_index(self._city_keys_lower)
+            self._country_keys = list(self.country_index)
+            
+            # Country listings are shown grouped by city; sort them once here
+            self._country_airports_by_city = {
+                country: sorted(airports_in_country, key=itemgetter('city'))
+                for country, airports_in_country in self.country_index.items()
+            }
+            self._names_lower = [airport['name'].lower() for airport in self.airports]
+            self._name_ngrams = build_ngram_index(self._names_lower)
+            
+            # Lowercase timezone -> airport positions; only a few hundred distinct zones
+            self._timezone_index = defaultdict(list)
+            for position, airport in enumerate(airports):
+                self._timezone_index[sys.intern(airport.get('timezone', '').lower())].append(position)
+            self._timezone_index = dict(self._timezone_index)
+            
+            # Only cache data that has loaded successfully
+            if from_json:
+                self.build_cache(data)
             
             print(f"✅ Loaded {len(self.airports)} airports from database")
             
@@ -42,8 +231,29 @@ class AirportSearch:
             print(f"❌ Error loading data: {e}")
             exit(1)
     
-    def search_by_code(self, code):
-        """Search airport by IATA or ICAO code"""
+    def cache_is_fresh(self):
+        """Check that the pickle cache exists and no JSON copy is newer than it"""
+        if not os.path.exists(INDEX_CACHE):
+            return False
+        cache_time = os.path.getmtime(INDEX_CACHE)
+        return all(
+            not os.path.exists(path) or os.path.getmtime(path) <= cache_time
+            for path in JSON_FILES.values()
+        )
+    
+    def build_cache(self, data):
+        """Pickle the raw airports and indexes so the next start skips JSON parsing"""
+        try:
+            with open(INDEX_CACHE, 'wb') as f:
+                pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+        except OSError as e:
+            print(f"⚠️  Could not write index cache: {e}")
+    
+    def search_by_code(self, code, suggest=False):
+        """Search airport by IATA or ICAO code
+        
+        With suggest=True, similar codes are printed when there is no exact match.
+        """
         code = code.upper().strip()
         
         # Try IATA first (3 letters)
@@ -54,9 +264,15 @@ class AirportSearch:
         if len(code) == 4 and code in self.icao_index:
             return [self.icao_index[code]]
         
-        # If not found, suggest similar codes
-        all_codes = list(self.iata_index.keys()) + list(self.icao_index.keys())
-        suggestions = get_close_matches(code, all_codes, n=5, cutoff=0.6)
+        if suggest:
+            self.suggest_codes(code)
+        
+        return []
+    
+    def suggest_codes(self, code):
+        """Print airport codes similar to an unknown code"""
+        code = code.upper().strip()
+        suggestions = close_matches(code, self._all_codes, 5)
         
         if suggestions:
             print(f"❓ '{code}' not found. Did you mean:")
@@ -67,23 +283,24 @@ class AirportSearch:
                 elif suggestion in self.icao_index:
                     airport = self.icao_index[suggestion]
                     print(f"  {suggestion} - {airport['name']}, {airport['city']}")
-        
-        return []
     
     def search_by_city(self, city_name):
         """Search airports by city name"""
         city_name = city_name.strip()
+        needle = city_name.lower()
         results = []
         
-        # Exact match first
-        for city_key, airports in self.city_index.items():
-            if city_name.lower() in city_key.lower():
-                results.extend(airports)
+        # Exact match first, verified only on cities sharing every trigram of the query
+        positions = ngram_candidates(self._city_ngrams, needle)
+        if positions is None:
+            positions = range(len(self._city_keys))
+        for i in positions:
+            if needle in self._city_keys_lower[i]:
+                results.extend(self.city_index[self._city_keys[i]])
         
         # If no exact match, try fuzzy matching
         if not results:
-            city_keys = list(self.city_index.keys())
-            matches = get_close_matches(city_name, city_keys, n=10, cutoff=0.6)  # Increased from 5
+            matches = close_matches(city_name, self._city_keys, 10)  # Increased from 5
             for match in matches:
                 results.extend(self.city_index[match])
         
@@ -98,8 +315,7 @@ class AirportSearch:
             return self.country_index[country_name]  # REMOVED LIMIT - show all
         
         # Try fuzzy matching
-        countries = list(self.country_index.keys())
-        matches = get_close_matches(country_name, countries, n=3, cutoff=0.6)
+        matches = close_matches(country_name, self._country_keys, 3)
         
         results = []
         for match in matches:
@@ -109,22 +325,40 @@ class AirportSearch:
     
     def search_by_name(self, airport_name):
         """Search airports by name"""
-        airport_name = airport_name.lower().strip()
-        results = []
+        needle = airport_name.lower().strip()
         
-        for airport in self.airports:
-            if airport_name in airport['name'].lower():
-                results.append(airport)
+        positions = ngram_candidates(self._name_ngrams, needle)
+        if positions is None:
+            positions = range(len(self.airports))
+        results = [self.airports[i] for i in positions if needle in self._names_lower[i]]
         
         return results  # REMOVED LIMIT - show all results
     
-    def smart_search(self, query):
-        """Smart search that tries multiple methods"""
+    def smart_search(self, query, suggest=False):
+        """Smart search that tries multiple methods
+        
+        With suggest=True, similar airport codes are printed when a
+        code-like query matches nothing at all.
+        """
         query = query.strip()
         
         if not query:
             return []
         
+        results = [self.airports[i] for i in self._smart_search_cached(query)]
+        
+        # Only fall back to fuzzy code suggestions when nothing matched
+        if not results and suggest and len(query) in [3, 4] and query.isalpha():
+            self.suggest_codes(query)
+        
+        return results
+    
+    def _smart_search_impl(self, query):
+        """Run the search chain for a stripped query, returning airport positions"""
+        return tuple(self._positions[id(airport)] for airport in self._search_chain(query))
+    
+    def _search_chain(self, query):
+        """Try code, city, country and name searches in turn"""
         # If it looks like an airport code
         if len(query) in [3, 4] and query.isalpha():
             results = self.search_by_code(query)
@@ -150,15 +384,7 @@ class AirportSearch:
     
     def display_airport(self, airport):
         """Display airport information in a nice format"""
-        print(f"\n{'='*60}")
-        print(f"🛫 {airport['name']}")
-        print(f"📍 {airport['city']}, {airport['country']}")
-        print(f"🔤 IATA: {airport['iata']} | ICAO: {airport['icao']}")
-        print(f"🌍 Coordinates: {airport['latitude']:.4f}, {airport['longitude']:.4f}")
-        print(f"📏 Elevation: {airport['elevation']} ft")
-        print(f"🕐 Timezone: {airport['timezone']}")
-        print(f"📊 Type: {airport['type']}")
-        print(f"{'='*60}")
+        sys.stdout.write(AIRPORT_CARD.format_map(airport))
     
     def display_results(self, results, query):
         """Display search results - IMPROVED to show all results"""
@@ -171,11 +397,13 @@ class AirportSearch:
         if len(results) == 1:
             self.display_airport(results[0])
         else:
-            # Show ALL results, not just limited number
+            # Show ALL results, not just limited number - written in one go
+            lines = []
             for i, airport in enumerate(results, 1):
-                print(f"\n{i}. {airport['name']} ({airport['iata']})")
-                print(f"   📍 {airport['city']}, {airport['country']}")
-                print(f"   🌍 {airport['latitude']:.4f}, {airport['longitude']:.4f}")
+                lines.append(f"\n{i}. {airport['name']} ({airport['iata']})")
+                lines.append(f"   📍 {airport['city']}, {airport['country']}")
+                lines.append(f"   🌍 {airport['latitude']:.4f}, {airport['longitude']:.4f}")
+            sys.stdout.write('\n'.join(lines) + '\n')
         
         # If multiple results, ask user to choose (show more options)
         if len(results) > 1:
@@ -187,9 +415,10 @@ class AirportSearch:
                     print(f"\n{'='*80}")
                     print(f"📋 DETAILED VIEW OF ALL {len(results)} AIRPORTS")
                     print(f"{'='*80}")
-                    for i, airport in enumerate(results, 1):
-                        print(f"\n--- Airport {i} of {len(results)} ---")
-                        self.display_airport(airport)
+                    sys.stdout.write(''.join(
+                        f"\n--- Airport {i} of {len(results)} ---\n" + AIRPORT_CARD.format_map(airport)
+                        for i, airport in enumerate(results, 1)
+                    ))
                 
                 elif choice.isdigit() and 1 <= int(choice) <= len(results):
                     self.display_airport(results[int(choice) - 1])
@@ -208,43 +437,76 @@ class AirportSearch:
         # Find the actual country name (in case of fuzzy match)
         actual_country = airports[0]['country']
         
-        print(f"\n{'='*60}")
-        print(f"🌍 ALL AIRPORTS IN {actual_country.upper()}")
-        print(f"{'='*60}")
-        print(f"Found {len(airports)} airports:")
-        print()
+        # Build the whole report first and write it once
+        lines = [
+            f"\n{'='*60}",
+            f"🌍 ALL AIRPORTS IN {actual_country.upper()}",
+            f"{'='*60}",
+            f"Found {len(airports)} airports:",
+            ""
+        ]
         
         current_city = None
         for i, airport in enumerate(airports, 1):
             if airport['city'] != current_city:
                 current_city = airport['city']
-                print(f"\n📍 {current_city}:")
+                lines.append(f"\n📍 {current_city}:")
             
-            print(f"   {i:3d}. {airport['name']} ({airport['iata']}/{airport['icao']})")
-            print(f"        🌍 {airport['latitude']:.4f}, {airport['longitude']:.4f}")
+            lines.append(f"   {i:3d}. {airport['name']} ({airport['iata']}/{airport['icao']})")
+            lines.append(f"        🌍 {airport['latitude']:.4f}, {airport['longitude']:.4f}")
+        
+        lines.append(f"\n{'='*60}")
+        lines.append(f"📊 SUMMARY: {len(airports)} airports in {len({a['city'] for a in airports})} cities")
+        lines.append(f"{'='*60}")
+        sys.stdout.write('\n'.join(lines) + '\n')
+    
+    def batch_search(self, queries):
+        """Resolve several country queries at once
+        
+        Returns the matching country name for each query, or None when
+        nothing is close enough.
+        """
+        queries = [query.strip() for query in queries]
+        matches = [query if query in self.country_index else None for query in queries]
+        pending = [i for i, match in enumerate(matches) if match is None]
+        
+        if pending and CDIST_AVAILABLE:
+            # Prefilter every unresolved query against every country in one pass,
+            # then let difflib pick among the survivors exactly as close_matches does
+            scores = process.cdist(
+                [queries[i] for i in pending], self._country_keys,
+                scorer=fuzz.ratio, processor=None,
+                score_cutoff=FUZZY_CUTOFF * 100 - 1e-6, workers=-1
+            )
+            for i, row in zip(pending, scores):
+                candidates = [self._country_keys[j] for j in row.nonzero()[0]]
+                found = get_close_matches(queries[i], candidates, n=1, cutoff=FUZZY_CUTOFF)
+                matches[i] = found[0] if found else None
+        else:
+            for i in pending:
+                found = close_matches(queries[i], self._country_keys, 1)
+                matches[i] = found[0] if found else None
         
-        print(f"\n{'='*60}")
-        print(f"📊 SUMMARY: {len(airports)} airports in {len(set(a['city'] for a in airports))} cities")
-        print(f"{'='*60}")
+        return matches
     
     def get_country_airports(self, country_name):
-        """Get all airports in a specific country"""
-        if country_name in self.country_index:
-            airports = self.country_index[country_name]
-            return sorted(airports, key=lambda x: x['city'])
+        """Get all airports in a specific country, sorted by city"""
+        if country_name in self._country_airports_by_city:
+            return self._country_airports_by_city[country_name]
         
         # Try fuzzy matching
-        from difflib import get_close_matches
-        countries = list(self.country_index.keys())
-        matches = get_close_matches(country_name, countries, n=1, cutoff=0.6)
+        matches = close_matches(country_name, self._country_keys, 1)
         
         if matches:
-            return sorted(self.country_index[matches[0]], key=lambda x: x['city'])
+            return self._country_airports_by_city[matches[0]]
         
         return []
     
-    def run_search(self):
-        """Run search mode with improved display"""
+    def run_search(self, read_query=input):
+        """Run search mode with improved display
+        
+        read_query is called with the prompt text to read each query.
+        """
         print("🚀 Airport Search System")
         print("=" * 40)
         print("Search by:")
@@ -257,7 +519,7 @@ class AirportSearch:
         
         while True:
             try:
-                query = input("\n🔍 Enter search query: ").strip()
+                query = read_query("\n🔍 Enter search query: ").strip()
                 
                 if query.lower() in ['quit', 'exit', 'q']:
                     print("👋 Goodbye!")
@@ -266,7 +528,7 @@ class AirportSearch:
                 if not query:
                     continue
                 
-                results = self.smart_search(query)
+                results = self.smart_search(query, suggest=True)
                 self.display_results(results, query)
                 
             except KeyboardInterrupt:
@@ -282,7 +544,7 @@ class AirportSearch:
 def main():
     """Main function"""
     # Check if data files exist
-    if not os.path.exists('data/airport_data.json'):
+    if not database_exists():
         print("❌ Airport database not found!")
         print("Please run 'python extended_data.py' first to create the database.")
         return
@@ -2,46 +2,47 @@
 # Airport statistics and reporting features
 # Usage: python statistics_reports.py
 
-import json
-from collections import Counter, defaultdict
-from smart_search import AirportSearch
+import sys
+from collections import Counter
+from functools import cached_property, lru_cache
+from itertools import takewhile
+from smart_search import AirportSearch, write_json
 
 class AirportStatistics(AirportSearch):
-    def __init__(self):
-        super().__init__()
-        self.generate_statistics()
+    # Regional grouping (simplified) is exactly the country index
+    regional_stats = property(lambda self: self.country_index)
     
-    def generate_statistics(self):
-        """Generate various statistics from airport data"""
-        print("📊 Generating statistics...")
-        
-        # Country statistics
-        self.country_stats = Counter()
-        
-        # City statistics
-        self.city_stats = Counter()
-        
-        # Airport type statistics (if available)
-        self.airport_types = Counter()
-        
-        # Regional statistics
-        self.regional_stats = defaultdict(list)
-        
-        for airport in self.airports:
-            country = airport['country']
-            city = airport['city']
-            
-            self.country_stats[country] += 1
-            self.city_stats[city] += 1
-            
-            # Try to determine airport size based on IATA code availability
-            if airport['iata'] and len(airport['iata']) == 3:
-                self.airport_types['Major (IATA)'] += 1
-            else:
-                self.airport_types['Regional/Minor'] += 1
-            
-            # Regional grouping (simplified)
-            self.regional_stats[country].append(airport)
+    # Each statistic is counted the first time a report needs it
+    
+    @cached_property
+    def country_stats(self):
+        """Airport count per country, counted straight from the country column"""
+        return Counter(self.countries)
+    
+    @cached_property
+    def city_stats(self):
+        """Airport count per city, counted straight from the city column"""
+        return Counter(self.cities)
+    
+    @cached_property
+    def airport_types(self):
+        """Airport type statistics, based on IATA code availability"""
+        # Counting one value in an int column runs entirely in C
+        majors = self.iata_lengths.count(3)
+        return +Counter({
+            'Major (IATA)': majors,
+            'Regional/Minor': len(self.airports) - majors
+        })
+    
+    @cached_property
+    def _top_countries_text(self):
+        """Top countries report, cached for the last few limits asked for"""
+        return lru_cache(maxsize=8)(self._render_top_countries)
+    
+    @cached_property
+    def _top_cities_text(self):
+        """Top cities report, cached for the last few limits asked for"""
+        return lru_cache(maxsize=8)(self._render_top_cities)
     
     def display_global_overview(self):
         """Display global airport statistics"""
@@ -62,25 +63,32 @@ class AirportStatistics(AirportSearch):
     
     def display_top_countries(self, limit=20):
         """Display countries with most airports"""
-        print(f"\n{'='*60}")
-        print(f"🏆 TOP {limit} COUNTRIES BY AIRPORT COUNT")
-        print(f"{'='*60}")
+        sys.stdout.write(self._top_countries_text(limit))
+    
+    def _render_top_countries(self, limit):
+        """Render the top countries report; most_common(limit) only heap-selects the top entries"""
+        lines = [f"\n{'='*60}", f"🏆 TOP {limit} COUNTRIES BY AIRPORT COUNT", f"{'='*60}"]
         
         for i, (country, count) in enumerate(self.country_stats.most_common(limit), 1):
             percentage = (count / len(self.airports)) * 100
-            print(f"{i:2d}. {country:30s} {count:4d} airports ({percentage:.1f}%)")
-        print(f"{'='*60}")
+            lines.append(f"{i:2d}. {country:30s} {count:4d} airports ({percentage:.1f}%)")
+        lines.append(f"{'='*60}")
+        return '\n'.join(lines) + '\n'
     
     def display_top_cities(self, limit=20):
         """Display cities with most airports"""
-        print(f"\n{'='*60}")
-        print(f"🏆 TOP {limit} CITIES BY AIRPORT COUNT")
-        print(f"{'='*60}")
+        sys.stdout.write(self._top_cities_text(limit))
+    
+    def _render_top_cities(self, limit):
+        """Render the top cities report"""
+        lines = [f"\n{'='*60}", f"🏆 TOP {limit} CITIES BY AIRPORT COUNT", f"{'='*60}"]
         
-        for i, (city, count) in enumerate(self.city_stats.most_common(limit), 1):
-            if count > 1:  # Only show cities with multiple airports
-                print(f"{i:2d}. {city:30s} {count:2d} airports")
-        print(f"{'='*60}")
+        # Counts come out in descending order, so stop at the first single-airport city
+        top_cities = takewhile(lambda item: item[1] > 1, self.city_stats.most_common(limit))
+        for i, (city, count) in enumerate(top_cities, 1):
+            lines.append(f"{i:2d}. {city:30s} {count:2d} airports")
+        lines.append(f"{'='*60}")
+        return '\n'.join(lines) + '\n'
     
     def display_country_details(self, country_name):
         """Display detailed statistics for a specific country"""
@@ -98,7 +106,7 @@ class AirportStatistics(AirportSearch):
         
         # Basic stats
         total_airports = len(airports)
-        iata_airports = len([a for a in airports if a['iata'] and len(a['iata']) == 3])
+        iata_airports = sum(1 for a in airports if a['iata'] and len(a['iata']) == 3)
         icao_only = total_airports - iata_airports
         
         print(f"✈️  Total Airports: {total_airports}")
@@ -121,7 +129,7 @@ class AirportStatistics(AirportSearch):
         # Airport list by city
         print("📍 All Airports by City:")
         current_city = None
-        for airport in sorted(airports, key=lambda x: x['city']):
+        for airport in airports:
             if airport['city'] != current_city:
                 current_city = airport['city']
                 print(f"\n   {current_city}:")
@@ -133,26 +141,37 @@ class AirportStatistics(AirportSearch):
     
     def search_airports_by_criteria(self, criteria_type, criteria_value):
         """Search airports by specific criteria"""
+        criteria_type = criteria_type.lower()
         results = []
         
-        for airport in self.airports:
-            if criteria_type.lower() == 'elevation':
-                # Search by elevation (in feet)
-                try:
-                    elevation = float(airport.get('elevation', 0))
-                    if elevation >= float(criteria_value):
-                        results.append((airport, elevation))
-                except:
-                    continue
-            
-            elif criteria_type.lower() == 'timezone':
-                if criteria_value.lower() in airport.get('timezone', '').lower():
-                    results.append(airport)
+        if criteria_type == 'elevation':
+            # Search by elevation (in feet) - parse the threshold once, not per airport
+            try:
+                threshold = float(criteria_value)
+            except (TypeError, ValueError):
+                return results
             
-            elif criteria_type.lower() == 'continent':
-                # This would require continent data - simplified approach
-                if criteria_value.lower() in airport.get('continent', '').lower():
-                    results.append(airport)
+            # Elevations are parsed once at load; NaN never passes the comparison
+            results = [
+                (airport, elevation)
+                for airport, elevation in zip(self.airports, self.elevations)
+                if elevation >= threshold
+            ]
+        
+        elif criteria_type == 'timezone':
+            # Match against the distinct timezones, then gather their airports
+            value = criteria_value.lower()
+            zones = [zone for zone in self._timezone_index if value in zone]
+            if len(zones) == 1:
+                positions = self._timezone_index[zones[0]]
+            else:
+                positions = sorted(i for zone in zones for i in self._timezone_index[zone])
+            results = [self.airports[i] for i in positions]
+        
+        elif criteria_type == 'continent':
+            # This would require continent data - simplified approach
+            value = criteria_value.lower()
+            results = [a for a in self.airports if value in a.get('continent', '').lower()]
         
         return results
     
@@ -170,13 +189,12 @@ class AirportStatistics(AirportSearch):
             filename = f"{actual_country.replace(' ', '_').lower()}_airports.json"
         
         try:
-            with open(filename, 'w', encoding='utf-8') as f:
-                json.dump({
-                    'country': actual_country,
-                    'total_airports': len(airports),
-                    'generated_date': '2024-12-19',
-                    'airports': airports
-                }, f, indent=2, ensure_ascii=False)
+            write_json(filename, {
+                'country': actual_country,
+                'total_airports': len(airports),
+                'generated_date': '2024-12-19',
+                'airports': airports
+            })
             
             print(f"✅ Data exported to '{filename}'")
             print(f"📊 Exported {len(airports)} airports from {actual_country}")
@@ -227,11 +245,25 @@ class AirportStatistics(AirportSearch):
                         self.display_country_details(country)
                 
                 elif choice == '5':
-                    country = input("Enter country name to export: ").strip()
-                    if country:
+                    countries = input("Enter country name(s) to export, comma-separated: ").split(',')
+                    countries = [country.strip() for country in countries if country.strip()]
+                    if len(countries) == 1:
                         filename = input("Enter filename (optional): ").strip()
                         filename = filename if filename else None
-                        self.export_country_data(country, filename)
+                        self.export_country_data(countries[0], filename)
+                    elif countries:
+                        # Bulk export: resolve every name in one batch, default filenames.
+                        # Names resolving to an already exported country are skipped.
+                        exported = set()
+                        for query, country in zip(countries, self.batch_search(countries)):
+                            if not country:
+                                print(f"❌ No data found for country '{query}'")
+                            elif country in exported:
+                                print(f"🔎 '{query}' → {country} (already exported)")
+                            else:
+                                print(f"🔎 '{query}' → {country}")
+                                self.export_country_data(country)
+                                exported.add(country)
                 
                 elif choice == '6':
                     break